@@ -1,8 +1,25 @@
+import mmap
+import os
+import stat
 import struct
 import sys
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from typing import BinaryIO, Dict, Iterator, List, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+# Fixed header: magic, version, sentinel, header end, frame count, frame size,
+# port count, channels
+_HEADER = struct.Struct(">4s4sIHHIHB")
+# Port entry: index, length, reserved, mode, flags, loop byte, reserved; the
+# reserved bytes are pad bytes (zero when packed, skipped when unpacked)
+_PORT_ENTRY = struct.Struct(">HH4xBHBx")
+# Lock the layouts to the RGB0 format (see README)
+assert _HEADER.size == 0x17 and _PORT_ENTRY.size == 0x0D
+
+# Raw frame bytes; frames read in bulk are zero-copy views into one buffer
+FrameData = Union[bytes, memoryview]
 
 
 @dataclass
@@ -25,29 +42,97 @@ class RgbHeader:
     port_count: int
     channels: int           # always 1 in observed code
     ports: List[PortMeta]
-    gamma_lut: List[int]    # 256 entries, 0–65535
+    gamma_lut: Sequence[int]  # 256 entries, 0–65535 (native-endian array('H'))
+
+    @cached_property
+    def offsets(self) -> Dict[int, int]:
+        """Byte offset of each port (by index) within a frame."""
+        return compute_port_offsets(self)
+
+    @cached_property
+    def ports_by_index(self) -> Dict[int, PortMeta]:
+        return {port.index: port for port in self.ports}
 
 
 @dataclass
 class RgbFile:
     header: RgbHeader
-    frames: List[bytes]  # raw frame bytes, length = header.frame_size each
-
-    def iter_frames(self) -> Iterator[bytes]:
+    frames: Sequence[FrameData]  # raw frame bytes, length = header.frame_size each
+    # contiguous buffer holding all of `frames` back to back, when parsed from a file
+    payload: Optional[memoryview] = field(default=None, repr=False, compare=False)
+    # read-only mapping backing `frames` when parsed with parse_rgb_lazy/parse_rgb_file_mmap
+    mapping: Optional[mmap.mmap] = field(default=None, repr=False, compare=False)
+
+    def __enter__(self) -> "RgbFile":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Drop the frame data and unmap the file, if it was memory-mapped.
+
+        Views obtained from this file (frames, port views) must be released or
+        dropped first, otherwise closing the mapping raises BufferError.
+        """
+        frames, payload = self.frames, self.payload
+        self.frames, self.payload = [], None
+        if self.mapping is None:
+            return
+        # Our own views export the mapping too; release them so it can close
+        if isinstance(frames, list):
+            for frame in frames:
+                if isinstance(frame, memoryview):
+                    frame.release()
+        if payload is not None:
+            payload.release()
+        self.mapping.close()
+        self.mapping = None
+
+    def iter_frames(self) -> Iterator[FrameData]:
         yield from self.frames
 
-    def iter_port_frames(self, port_index: int) -> Iterator[bytes]:
-        """Yield just the bytes for one port across all frames."""
-        port = self.header.ports[port_index]
-        # compute offsets based on port ordering
-        offset = 0
-        for s in self.header.ports:
-            if s.index == port_index:
-                break
-            offset += s.length
+    def port_view(self, port_index: int) -> Sequence[memoryview]:
+        """Return the bytes for one port across all frames as zero-copy memoryviews."""
+        port = self.header.ports_by_index[port_index]
+        offset = self.header.offsets[port_index]
+        if self.payload is not None:
+            return StridedView(
+                self.payload, offset, self.header.frame_size, port.length, len(self.frames)
+            )
+        return [memoryview(frame)[offset : offset + port.length] for frame in self.frames]
+
+    def port_bytes(self, port_index: int) -> bytes:
+        """Copy one port's bytes from every frame into a single contiguous buffer."""
+        return b"".join(self.port_view(port_index))
 
-        for frame in self.frames:
-            yield frame[offset : offset + port.length]
+    def iter_port_frames(self, port_index: int) -> Iterator[memoryview]:
+        """Yield just the bytes for one port across all frames (use bytes() for a copy)."""
+        yield from self.port_view(port_index)
+
+
+class StridedView(Sequence[memoryview]):
+    """Read-only sequence of `length`-byte records spaced `stride` bytes apart in a buffer."""
+
+    def __init__(self, buf: memoryview, start: int, stride: int, length: int, count: int) -> None:
+        self._buf = buf
+        self._start = start
+        self._stride = stride
+        self._length = length
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[memoryview, List[memoryview]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        begin = self._start + index * self._stride
+        return self._buf[begin : begin + self._length]
 
 
 def compute_port_offsets(header: RgbHeader) -> Dict[int, int]:
@@ -66,60 +151,73 @@ def read_exact(f: BinaryIO, n: int) -> bytes:
     return data
 
 
+def _advise_sequential(f: BinaryIO) -> None:
+    """Hint that ``f`` is read front to back so the kernel reads ahead aggressively."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except OSError:
+        pass  # not a regular file (e.g. a pipe); the hint is optional
+
+
+def _remaining_bytes(f: BinaryIO) -> Optional[int]:
+    """Bytes left after the current position, or None if ``f`` is not a regular file."""
+    st = os.fstat(f.fileno())
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return max(st.st_size - f.tell(), 0)
+
+
+def _slice_frames(buf: memoryview, frame_size: int, frame_count: int) -> List[memoryview]:
+    """Split ``buf`` into up to ``frame_count`` zero-copy frames, dropping a partial tail."""
+    if frame_size:
+        frame_count = min(frame_count, len(buf) // frame_size)
+    return [buf[i * frame_size : (i + 1) * frame_size] for i in range(frame_count)]
+
+
 def parse_rgb_header(f: BinaryIO) -> RgbHeader:
     # Fixed header (0x17 bytes, ports start immediately after)
-    hdr_raw = read_exact(f, 0x17)
+    hdr_raw = read_exact(f, _HEADER.size)
 
-    magic = hdr_raw[0:4].decode("ascii", errors="replace")
-    version = hdr_raw[4:8].decode("ascii", errors="replace")
     # The reference binary writes these as big-endian words/integers
-    sentinel = struct.unpack(">I", hdr_raw[8:12])[0]
-    header_end_offset = struct.unpack(">H", hdr_raw[12:14])[0]
-    frame_count = struct.unpack(">H", hdr_raw[14:16])[0]
-    frame_size = struct.unpack(">I", hdr_raw[0x10:0x14])[0]
-    port_count = struct.unpack(">H", hdr_raw[0x14:0x16])[0]
-    channels = hdr_raw[0x16]
+    (
+        magic_b,
+        version_b,
+        sentinel,
+        header_end_offset,
+        frame_count,
+        frame_size,
+        port_count,
+        channels,
+    ) = _HEADER.unpack_from(hdr_raw)
+    magic = magic_b.decode("ascii", errors="replace")
+    version = version_b.decode("ascii", errors="replace")
 
     if magic != "RGB0":
         raise ValueError(f"Not an RGB file (magic={magic!r})")
     # Optional sanity check:
     # if version != "1001": raise or warn
 
-    ports: List[PortMeta] = []
-
     # Port entries: 0x0D bytes used per port
-    seg_table_raw = read_exact(f, port_count * 0x0D)
-
-    for i in range(port_count):
-        off = i * 0x0D
-        idx_hi = seg_table_raw[off + 0]
-        idx_lo = seg_table_raw[off + 1]
-        port_index = (idx_hi << 8) | idx_lo
-
-        length_hi = seg_table_raw[off + 2]
-        length_lo = seg_table_raw[off + 3]
-        port_length = (length_hi << 8) | length_lo
-
-        # 4 bytes reserved at off+4 .. off+7
-        mode = seg_table_raw[off + 8]
-        flags = struct.unpack(">H", seg_table_raw[off + 9 : off + 11])[0]  # 0x0080
-        loop_byte = seg_table_raw[off + 11]
-        loop_flag = bool(loop_byte & 0x80)
-        # off+12 reserved
-
-        ports.append(
-            PortMeta(
-                index=port_index,
-                length=port_length,
-                mode=mode,
-                flags=flags,
-                loop_flag=loop_flag,
-            )
+    seg_table_raw = read_exact(f, port_count * _PORT_ENTRY.size)
+    ports = [
+        PortMeta(
+            index=port_index,
+            length=port_length,
+            mode=mode,
+            flags=flags,  # 0x0080
+            loop_flag=bool(loop_byte & 0x80),
         )
+        for port_index, port_length, mode, flags, loop_byte in _PORT_ENTRY.iter_unpack(seg_table_raw)
+    ]
 
     # Gamma LUT: 256 * 2 bytes, big-endian
     gamma_raw = read_exact(f, 256 * 2)
-    gamma_lut = list(struct.unpack(">256H", gamma_raw))
+    gamma_lut = array("H", gamma_raw)
+    if sys.byteorder == "little":
+        # Big-endian hosts already have the LUT in host order
+        gamma_lut.byteswap()
 
     return RgbHeader(
         magic=magic,
@@ -137,45 +235,88 @@ def parse_rgb_header(f: BinaryIO) -> RgbHeader:
 
 def parse_rgb_file(path: str, max_frames: Optional[int] = None) -> RgbFile:
     with open(path, "rb") as f:
+        _advise_sequential(f)
         header = parse_rgb_header(f)
 
-        frames: List[bytes] = []
         target_frames = max_frames
         if target_frames is None and header.frame_count:
             target_frames = header.frame_count
 
-        while target_frames is None or len(frames) < target_frames:
-            try:
-                frame = read_exact(f, header.frame_size)
-            except EOFError:
-                break
-
-            frames.append(frame)
-            if target_frames is not None and len(frames) >= target_frames:
-                break
-
-    return RgbFile(header=header, frames=frames)
+        # One read for the whole payload; frames are views into it. The read is
+        # capped at what the file holds, since the header may overstate it.
+        size = -1 if target_frames is None else max(header.frame_size * target_frames, 0)
+        remaining = _remaining_bytes(f)
+        if remaining is not None and (size < 0 or size > remaining):
+            size = remaining
+        blob = f.read(size)
+        if target_frames is None:
+            # Frame count unknown: take every complete frame up to EOF
+            target_frames = len(blob) // header.frame_size if header.frame_size else 0
+
+    payload = memoryview(blob)
+    frames = _slice_frames(payload, header.frame_size, target_frames)
+    payload = payload[: len(frames) * header.frame_size]
+    return RgbFile(header=header, frames=frames, payload=payload)
+
+
+def parse_rgb_lazy(path: str, max_frames: Optional[int] = None) -> RgbFile:
+    """Memory-map ``path`` and index frames on demand; nothing is read up front."""
+    with open(path, "rb") as f:
+        # An empty file cannot be mapped; fail like the eager parser does
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            raise EOFError("Unexpected EOF while reading")
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        header = parse_rgb_header(mapping)
+    except BaseException:
+        mapping.close()
+        raise
+
+    # Frames start right after the gamma LUT
+    payload = memoryview(mapping)[mapping.tell() :]
+    frame_count = max_frames
+    if frame_count is None:
+        frame_count = header.frame_count
+        if not frame_count and header.frame_size:
+            frame_count = len(payload) // header.frame_size
+    if header.frame_size:
+        frame_count = min(frame_count, len(payload) // header.frame_size)
+    frame_count = max(frame_count, 0)
+
+    payload = payload[: frame_count * header.frame_size]
+    frames = StridedView(payload, 0, header.frame_size, header.frame_size, frame_count)
+    return RgbFile(header=header, frames=frames, payload=payload, mapping=mapping)
+
+
+def parse_rgb_file_mmap(path: str, max_frames: Optional[int] = None) -> RgbFile:
+    """Like parse_rgb_file, but frames are zero-copy views into a read-only mmap."""
+    rgb = parse_rgb_lazy(path, max_frames)
+    rgb.frames = list(rgb.frames)
+    return rgb
 
 
 def summarize_rgb(path: Path) -> None:
-    rgb = parse_rgb_file(str(path))
-    frame_count = len(rgb.frames)
-    print(f"{path.name}: frame_size={rgb.header.frame_size} bytes, frames={frame_count}", end="")
-    if rgb.header.frame_count:
-        print(f" (header claims {rgb.header.frame_count})")
-    else:
-        print()
-    print(f"  gamma sample: {rgb.header.gamma_lut[:4]}")
-    offsets = compute_port_offsets(rgb.header)
-    for port in rgb.header.ports:
-        offset = offsets.get(port.index, 0)
+    with parse_rgb_lazy(str(path)) as rgb:
+        frame_count = len(rgb.frames)
         print(
-            f"    Port {port.index}: len={port.length}, mode=0x{port.mode:02x}, "
-            f"flags=0x{port.flags:04x}, loop={port.loop_flag}, offset={offset}"
+            f"{path.name}: frame_size={rgb.header.frame_size} bytes, frames={frame_count}",
+            end="",
         )
-    if rgb.frames:
-        first_frame = rgb.frames[0]
-        print(f"  first frame preview (16 bytes): {first_frame[:16].hex()}")
+        if rgb.header.frame_count:
+            print(f" (header claims {rgb.header.frame_count})")
+        else:
+            print()
+        print(f"  gamma sample: {list(rgb.header.gamma_lut[:4])}")
+        offsets = rgb.header.offsets
+        for port in rgb.header.ports:
+            offset = offsets.get(port.index, 0)
+            print(
+                f"    Port {port.index}: len={port.length}, mode=0x{port.mode:02x}, "
+                f"flags=0x{port.flags:04x}, loop={port.loop_flag}, offset={offset}"
+            )
+        if rgb.frames:
+            # no frame view may outlive the block, or closing the mapping fails
+            print(f"  first frame preview (16 bytes): {rgb.frames[0][:16].hex()}")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
+import os
 import struct
+import sys
+from array import array
 from dataclasses import dataclass
+from operator import attrgetter
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import Optional, Sequence, Tuple, Union
 
 MAGIC = b"RGB0"
 VERSION = b"1001"
@@ -15,9 +19,27 @@ GAMMA_SIZE = 256 * 2
 LEDS_PER_PORT_DEFAULT = 1000
 PORT_COUNT_DEFAULT = 16
 
+# Fixed header: magic, version, sentinel, header end, frame count, frame size,
+# port count, channels
+_HEADER = struct.Struct(">4s4sIHHIHB")
+# Port entry: index, length, reserved, mode, flags, loop byte, reserved; the
+# reserved bytes are pad bytes (zero when packed, skipped when unpacked)
+_PORT_ENTRY = struct.Struct(">HH4xBHBx")
+# Lock the layouts to the RGB0 format (see README)
+assert _HEADER.size == HEADER_PREFIX and _PORT_ENTRY.size == PORT_ENTRY_SIZE
+
+# Bytes translated at a time when baking a gamma curve into the payload
+_GAMMA_CHUNK = 1 << 16
+
+# Raw pixel payloads; anything exposing the buffer protocol (e.g. a uint8
+# numpy array) is accepted wherever these are.
+BytesLike = Union[bytes, bytearray, memoryview]
+
 
 @dataclass(frozen=True)
 class RGB:
+    """Single pixel, kept for callers that build frames pixel by pixel."""
+
     r: int
     g: int
     b: int
@@ -25,19 +47,34 @@ class RGB:
     def to_bytes(self) -> bytes:
         return bytes((self.r & 0xFF, self.g & 0xFF, self.b & 0xFF))
 
+    @staticmethod
+    def pack_array(rgbs: Sequence["RGB"]) -> bytearray:
+        """Pack pixels into the contiguous r, g, b byte layout used by frames."""
+        packed = bytearray(len(rgbs) * 3)
+        for channel, getter in enumerate(_CHANNEL_GETTERS):
+            # one C-level pass per channel, scattered into every third byte
+            try:
+                packed[channel::3] = bytes(map(getter, rgbs))
+            except ValueError:
+                # some value is outside 0-255; mask like to_bytes does
+                packed[channel::3] = bytes(value & 0xFF for value in map(getter, rgbs))
+        return packed
+
+
+_CHANNEL_GETTERS = (attrgetter("r"), attrgetter("g"), attrgetter("b"))
+
+
+PortData = Union[Sequence[RGB], BytesLike]
+# One frame: `frame_size` bytes laid out as (port, led, rgb), e.g. a uint8
+# array shaped (16, leds_per_port, 3), or a legacy sequence of 16 ports
+Frame = Union[BytesLike, Sequence[PortData]]
+
 
 def _build_header(frame_size: int, frame_count: int, port_count: int) -> bytes:
     header_end = HEADER_PREFIX + port_count * PORT_ENTRY_SIZE + GAMMA_SIZE - 1
-    header = bytearray()
-    header.extend(MAGIC)
-    header.extend(VERSION)
-    header.extend(struct.pack(">I", SENTINEL))
-    header.extend(struct.pack(">H", header_end))
-    header.extend(struct.pack(">H", frame_count))
-    header.extend(struct.pack(">I", frame_size))
-    header.extend(struct.pack(">H", port_count))
-    header.append(CHANNELS)
-    return bytes(header)
+    return _HEADER.pack(
+        MAGIC, VERSION, SENTINEL, header_end, frame_count, frame_size, port_count, CHANNELS
+    )
 
 
 def _build_port_table(
@@ -46,94 +83,220 @@ def _build_port_table(
     loop_byte: int,
     mode: int = MODE_SPI_TTL,
     flags: int = FLAGS,
-) -> bytes:
-    entries = bytearray()
+) -> bytearray:
+    entries = bytearray(port_count * _PORT_ENTRY.size)
     for idx in range(port_count):
-        entries.extend(struct.pack(">H", idx))
-        entries.extend(struct.pack(">H", bytes_per_port))
-        entries.extend(struct.pack(">I", 0))
-        entries.append(mode)
-        entries.extend(struct.pack(">H", flags))
-        entries.append(loop_byte)
-        entries.append(0x00)
-    return bytes(entries)
+        _PORT_ENTRY.pack_into(
+            entries, idx * _PORT_ENTRY.size, idx, bytes_per_port, mode, flags, loop_byte
+        )
+    return entries
 
 
 def _build_gamma_table(gamma_values: Optional[Sequence[int]] = None) -> bytes:
-    entries = bytearray()
     lut = list(gamma_values) if gamma_values is not None else list(range(256))
     if len(lut) != 256:
         raise ValueError("gamma_values must contain exactly 256 entries")
-    for value in lut:
-        entries.extend(struct.pack(">H", value))
-    return bytes(entries)
+    entries = array("H", lut)
+    if sys.byteorder == "little":
+        entries.byteswap()
+    return entries.tobytes()
+
+
+def _apply_gamma(cube: memoryview, gamma_values: Sequence[int], out: bytearray) -> None:
+    """Map each byte of ``cube`` through the LUT into ``out``, which may back ``cube``.
+
+    Works in cache-sized chunks, so the payload is streamed once and no second
+    full-size copy is made.
+    """
+    lut = list(gamma_values)
+    if len(lut) != 256:
+        raise ValueError("gamma_values must contain exactly 256 entries")
+    if any(not 0 <= value <= 0xFF for value in lut):
+        raise ValueError(
+            "apply_gamma requires gamma_values in 0-255 (frames hold 8-bit channels)"
+        )
+    table = bytes(lut)
+    for start in range(0, cube.nbytes, _GAMMA_CHUNK):
+        end = start + _GAMMA_CHUNK
+        out[start:end] = cube[start:end].tobytes().translate(table)
+
+
+def _buffer_view(data: object) -> Optional[memoryview]:
+    """Return a memoryview of ``data`` as given, or None if it is not bytes-like."""
+    try:
+        return memoryview(data)
+    except TypeError:
+        return None
 
 
-def _validate_frames(
-    frames: Sequence[Sequence[Sequence[RGB]]], port_count: int, leds_per_port: int
+def _as_buffer(data: object) -> Optional[memoryview]:
+    """Return a flat byte view of ``data``, or None if it is not bytes-like."""
+    view = _buffer_view(data)
+    if view is None:
+        return None
+    if not view.c_contiguous:
+        return memoryview(view.tobytes())
+    return view.cast("B")
+
+
+def _check_pixel_layout(
+    view: memoryview, layout: Tuple[int, ...], what: str, leading: int = 0
 ) -> None:
+    """Reject buffers whose items are not bytes or whose N-D shape is not `layout`."""
+    if view.itemsize != 1:
+        raise ValueError(
+            f"{what} items are {view.itemsize} bytes wide; expected 8-bit channel values"
+        )
+    if view.ndim == leading + len(layout) and view.shape[leading:] != layout:
+        raise ValueError(
+            f"{what} has shape {view.shape}; expected trailing dimensions {layout}"
+        )
+
+
+def _validate_frames(frames: Sequence[Frame], port_count: int, leds_per_port: int) -> None:
     if not frames:
         raise ValueError("frames sequence must not be empty")
+    bytes_per_port = leds_per_port * 3
+    frame_size = port_count * bytes_per_port
     for frame_idx, frame in enumerate(frames):
+        frame_buf = _buffer_view(frame)
+        if frame_buf is not None:
+            _check_pixel_layout(frame_buf, (port_count, leds_per_port, 3), f"frame {frame_idx}")
+            if frame_buf.nbytes != frame_size:
+                raise ValueError(
+                    f"frame {frame_idx} has {frame_buf.nbytes} bytes; expected {frame_size}"
+                )
+            continue
         if len(frame) != port_count:
             raise ValueError(
                 f"frame {frame_idx} contains {len(frame)} ports; expected {port_count}"
             )
         for port_idx, port_data in enumerate(frame):
-            if len(port_data) != leds_per_port:
+            buf = _buffer_view(port_data)
+            if buf is not None:
+                _check_pixel_layout(
+                    buf, (leds_per_port, 3), f"frame {frame_idx} port {port_idx}"
+                )
+                if buf.nbytes != bytes_per_port:
+                    raise ValueError(
+                        f"frame {frame_idx} port {port_idx} has {buf.nbytes} bytes; "
+                        f"expected {bytes_per_port}"
+                    )
+            elif len(port_data) != leds_per_port:
                 raise ValueError(
                     f"frame {frame_idx} port {port_idx} has {len(port_data)} LEDs; "
                     f"expected {leds_per_port}"
                 )
 
 
-def _port_bytes(port_pixels: Sequence[RGB]) -> bytes:
-    buf = bytearray()
-    for led in port_pixels:
-        buf.extend(led.to_bytes())
-    return bytes(buf)
+def _validate_frame_buffer(cube: memoryview, port_count: int, leds_per_port: int) -> int:
+    """Check a whole-capture buffer by shape and size alone; returns its frame count."""
+    _check_pixel_layout(cube, (port_count, leds_per_port, 3), "frame buffer", leading=1)
+    frame_size = port_count * leds_per_port * 3
+    if not cube.nbytes or cube.nbytes % frame_size:
+        raise ValueError(
+            f"frame buffer holds {cube.nbytes} bytes; "
+            f"expected a non-zero multiple of the {frame_size}-byte frame size"
+        )
+    return cube.nbytes // frame_size
+
+
+def _port_bytes(port_pixels: PortData) -> BytesLike:
+    buf = _as_buffer(port_pixels)
+    if buf is not None:
+        return buf
+    return RGB.pack_array(port_pixels)
+
+
+def _pack_frames(frames: Sequence[Frame], frame_size: int, bytes_per_port: int) -> bytearray:
+    """Concatenate every port of every frame into one preallocated payload buffer."""
+    payload = bytearray(len(frames) * frame_size)
+    pos = 0
+    for frame in frames:
+        frame_buf = _as_buffer(frame)
+        if frame_buf is not None:
+            payload[pos : pos + frame_size] = frame_buf
+            pos += frame_size
+            continue
+        for port_data in frame:
+            payload[pos : pos + bytes_per_port] = _port_bytes(port_data)
+            pos += bytes_per_port
+    return payload
+
+
+def _write_buffers(path: Path, buffers: Sequence[BytesLike]) -> None:
+    """Write ``buffers`` back to back to ``path``, gathered by the kernel where possible."""
+    views = [memoryview(buf).cast("B") for buf in buffers]
+    open_flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, open_flags, 0o666)
+    try:
+        while views:
+            if hasattr(os, "writev"):
+                written = os.writev(fd, views)
+            else:
+                written = os.write(fd, views[0])
+            # drop what was written; writes may stop short on large payloads
+            while views and written >= views[0].nbytes:
+                written -= views.pop(0).nbytes
+            if views:
+                views[0] = views[0][written:]
+    finally:
+        os.close(fd)
 
 
 def write_sc_rgb0(
     output_dir: Path,
-    frames: Sequence[Sequence[Sequence[RGB]]],
+    frames: Union[BytesLike, Sequence[Frame]],
     leds_per_port: int = LEDS_PER_PORT_DEFAULT,
     run_number: int = 1,
     gamma_values: Optional[Sequence[int]] = None,
     loop_byte: int = 0x50,
     mode: int = MODE_SPI_TTL,
     flags: int = FLAGS,
+    apply_gamma: bool = False,
 ) -> Path:
     """
     Emit a capture file that is compatible with the GICO 5016A SD card runner.
 
     Args:
         output_dir: destination directory for the generated file.
-        frames: list of frames; each frame must provide 16 ports and each port the expected number of bytes.
+        frames: the pixel data, laid out as (frame, port, led, rgb) bytes. Preferably one
+            bytes-like buffer holding the whole capture (e.g. a uint8 array shaped
+            `(frame_count, 16, leds_per_port, 3)`), which is written without copying; otherwise
+            a list of frames, each one bytes-like `Frame` or a sequence of 16 ports given as
+            `leds_per_port * 3`-byte buffers or lists of `RGB` instances.
         leds_per_port: number of RGB pixels per port (default 1000, i.e., six Art-Net universes).
         run_number: value used to synthesize `Sc-<run_number:02d>-01.rgb`.
         gamma_values: optional 256-entry gamma LUT (defaults to identity).
         loop_byte: per-port control byte (0x50 preserves the working captures).
         mode: per-port SPI/TTL mode byte (0x06 by default).
         flags: per-port flags word (0x80FA matches existing captures).
+        apply_gamma: map the pixels through `gamma_values` while writing them (values must be
+            0-255) and store the identity LUT, instead of leaving the curve to the controller.
     """
     port_count = PORT_COUNT_DEFAULT
     bytes_per_port = leds_per_port * 3
-    frame_count = len(frames)
-    _validate_frames(frames, port_count, bytes_per_port)
-
     frame_size = port_count * bytes_per_port
+    packed: Optional[bytearray] = None
+    cube = _buffer_view(frames)
+    if cube is None:
+        _validate_frames(frames, port_count, leds_per_port)
+        packed = _pack_frames(frames, frame_size, bytes_per_port)
+        cube = memoryview(packed)
+    frame_count = _validate_frame_buffer(cube, port_count, leds_per_port)
+    cube = _as_buffer(cube)
+    if apply_gamma and gamma_values is not None:
+        # The packed payload is ours to overwrite; caller buffers get one new output
+        out = packed if packed is not None else bytearray(cube.nbytes)
+        _apply_gamma(cube, gamma_values, out)
+        cube = memoryview(out)
+        gamma_values = None  # the curve is baked into the pixels
+
     header = _build_header(frame_size, frame_count, port_count)
     port_table = _build_port_table(port_count, bytes_per_port, loop_byte, mode, flags)
     gamma = _build_gamma_table(gamma_values)
 
     output_path = output_dir / f"Sc-{run_number:02d}-01.rgb"
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("wb") as writer:
-        writer.write(header)
-        writer.write(port_table)
-        writer.write(gamma)
-        for frame in frames:
-            for port_data in frame:
-                writer.write(_port_bytes(port_data))
+    _write_buffers(output_path, [header, port_table, gamma, cube])
     return output_path